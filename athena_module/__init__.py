@@ -1,3 +1,7 @@
 from .athena_operations import (
     create_athena_database_and_table, run_athena_query, performance_test_select_query
 )
+
+__all__ = [
+    'create_athena_database_and_table', 'run_athena_query', 'performance_test_select_query'
+]
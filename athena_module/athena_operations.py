@@ -5,25 +5,153 @@ Description: This module provides functions to interact with AWS Athena and S3.
 It includes functionalities to run Athena queries, manage query results, and perform performance tests.
 """
 
+import csv
+import functools
+import hashlib
+import io
+import itertools
+import os
+import random
+import re
+import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
+
+from botocore.config import Config
+from botocore.exceptions import ClientError, WaiterError
+from botocore.waiter import WaiterModel, create_waiter_with_client
+
+from s3_module.s3_operations import get_s3_clients
+from utils.aws_clients import create_client
+from utils.helpers import load_config, generate_filename, parse_json, dump_json
+
+CLIENT_CONFIG = Config(
+    connect_timeout=10,
+    max_pool_connections=50,
+    tcp_keepalive=True,
+    retries={
+        'max_attempts': 10,
+        'mode': 'adaptive'
+    }
+)
+
+DATA_CATALOG = 'AwsDataCatalog'
+
+# Local directory holding pointers to the results of cached SELECT queries
+QUERY_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.athena_cache')
+QUERY_CACHE_TTL = 3600
+
+# Matches queries whose first statement keyword is SELECT, skipping leading whitespace
+# and SQL comments. Whitespace is only consumed around each comment, and a block comment
+# body cannot run past its closing '*/', so every prefix splits into comments in exactly
+# one way and a non-SELECT query fails in linear time.
+SELECT_QUERY_PATTERN = re.compile(
+    r'\s*(?:(?:--[^\n]*(?:\n|$)|/\*(?:[^*]|\*(?!/))*\*/)\s*)*select\b', re.IGNORECASE)
+
+# Number of result rows parsed and written to stdout at a time
+RESULT_BATCH_SIZE = 1000
+
+# Maximum number of query execution IDs accepted by BatchGetQueryExecution
+BATCH_GET_QUERY_EXECUTION_LIMIT = 50
+
+# Athena's default DML query timeout is 30 minutes, so with one status check per second
+# a healthy query always finishes within this many checks
+QUERY_WAIT_MAX_ATTEMPTS = 1800
+
+QUERY_WAITER_CONFIG = {
+    'version': 2,
+    'waiters': {
+        'QueryCompleted': {
+            'operation': 'GetQueryExecution',
+            'delay': 1,
+            'maxAttempts': QUERY_WAIT_MAX_ATTEMPTS,
+            'acceptors': [
+                {'matcher': 'path', 'argument': 'QueryExecution.Status.State',
+                 'expected': 'SUCCEEDED', 'state': 'success'},
+                {'matcher': 'path', 'argument': 'QueryExecution.Status.State',
+                 'expected': 'FAILED', 'state': 'failure'},
+                {'matcher': 'path', 'argument': 'QueryExecution.Status.State',
+                 'expected': 'CANCELLED', 'state': 'failure'}
+            ]
+        }
+    }
+}
 
-import boto3
-from botocore.exceptions import ClientError
 
-from utils.helpers import load_config, generate_filename
+def get_athena_client(region='us-east-1'):
+    """Initialize and return Athena client, reusing it across calls for the same region."""
+    # Cached on the resolved region, however the caller spelled it
+    return _cached_athena_client(region or 'us-east-1')
 
 
-def get_athena_client(region='us-east-1'):
-    """Initialize and return Athena client."""
-    return boto3.client('athena', region_name=region)
+@functools.lru_cache(maxsize=None)
+def _cached_athena_client(region):
+    return create_client('athena', region_name=region, config=CLIENT_CONFIG)
 
 
-def get_s3_client(region='us-east-1'):
-    """Initialize and return S3 client."""
-    return boto3.client('s3', region_name=region)
+def cached_query(ttl=QUERY_CACHE_TTL):
+    """
+    Decorator caching the results of SELECT queries run through run_athena_query.
+
+    Cache entries are small JSON pointers in QUERY_CACHE_DIR, keyed on a hash of the query,
+    database and region, that record where Athena wrote the query's results. On a hit, the
+    stored result file is read back from S3 instead of running the query again. Only
+    queries that succeeded and returned data are cached. The wrapped function gains a 'use_cache' keyword argument, which defaults to False.
 
+    Args:
+        ttl (int): How long a cached result stays valid, in seconds. Defaults to one hour.
 
-def run_athena_query(query, database_name, athena_output_bucket, region='us-east-1'):
+    Returns:
+        function: The decorator.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(query, database_name, athena_output_bucket, region='us-east-1',
+                    use_cache=False, verbose=False):
+            if not use_cache or not SELECT_QUERY_PATTERN.match(query):
+                return func(query, database_name, athena_output_bucket, region, verbose)
+
+            # Database names and regions never contain NUL, so the joined key is unambiguous
+            cache_key = hashlib.sha256(
+                '\0'.join((query, database_name, region)).encode('utf-8')).hexdigest()
+            cache_path = os.path.join(QUERY_CACHE_DIR, f"{cache_key}.json")
+            try:
+                with open(cache_path, 'rb') as cache_file:
+                    entry = parse_json(cache_file.read())
+                expires_at = float(entry['expires_at'])
+                bucket_name, key = entry['result_s3_uri'][len('s3://'):].split('/', 1)
+            except (OSError, ValueError, TypeError, KeyError, AttributeError):
+                entry = None  # Missing or malformed entries count as a miss
+
+            if entry and expires_at > time.time():
+                try:
+                    print(f"Using cached results from '{entry['result_s3_uri']}'")
+                    if verbose:
+                        read_results_file(bucket_name, key, region, verbose)
+                    else:
+                        # Only confirm the results still exist; nothing will be printed
+                        s3_client, _ = get_s3_clients(region)
+                        s3_client.head_object(Bucket=bucket_name, Key=key)
+                    return entry['result_s3_uri']
+                except ClientError as e:
+                    print(f"Cached results are no longer available, re-running query: {e}")
+
+            result_s3_uri = func(query, database_name, athena_output_bucket, region, verbose)
+            if result_s3_uri:
+                os.makedirs(QUERY_CACHE_DIR, exist_ok=True)
+                with open(cache_path, 'wb') as cache_file:
+                    cache_file.write(dump_json({
+                        'result_s3_uri': result_s3_uri,
+                        'expires_at': time.time() + ttl
+                    }))
+            return result_s3_uri
+        return wrapper
+    return decorator
+
+
+@cached_query()
+def run_athena_query(query, database_name, athena_output_bucket, region='us-east-1',
+                     verbose=False):
     """
     Executes a given SQL query in Athena and stores the results if applicable.
 
@@ -32,125 +160,336 @@ def run_athena_query(query, database_name, athena_output_bucket, region='us-east
         database_name (str): The name of the Athena database.
         athena_output_bucket (str): The S3 bucket to store query results.
         region (str): The AWS region. Defaults to 'us-east-1'.
+        verbose (bool): If True, print the result rows of SELECT queries. Defaults to False.
+
+    Returns:
+        str or None: The S3 URI of the result file for SELECT queries that returned data,
+        None otherwise.
 
     Raises:
         ClientError: If there's an issue executing the query.
     """
     athena_client = get_athena_client(region)
+
+    # SELECT results are written straight under a readable prefix, so they never need
+    # to be copied to a cleaner name afterwards
+    is_select = SELECT_QUERY_PATTERN.match(query) is not None
+    result_prefix = f"{generate_filename(query)}/" if is_select else ''
     try:
-        response = athena_client.start_query_execution(
-            QueryString=query,
-            QueryExecutionContext={'Database': database_name},
-            ResultConfiguration={'OutputLocation': f's3://{athena_output_bucket}/'}
-        )
-        query_execution_id = response['QueryExecutionId']
+        query_execution_id = start_query(query, database_name, athena_output_bucket,
+                                         athena_client, prefix=result_prefix)
         print(f"Executing Athena query: {query_execution_id}")
 
-        # Wait for the query to complete
-        wait_for_query_to_complete(query_execution_id, athena_client)
-
-        # Check if the query is a SELECT statement
-        if query.strip().lower().startswith('select'):
-            query_results = get_query_results(query_execution_id, athena_client)
-
-            if query_results:  # Only store results if the query returns data
-                file_name = generate_filename(query)
-                store_query_results(query_execution_id, athena_output_bucket, file_name)
-                print(
-                    f"Results stored with filename: '{file_name}.csv' in bucket: '{athena_output_bucket}'")
-            else:
-                print("No data returned. Query results not stored.")
+        # Wait for the query to complete; a failed or cancelled query has no results
+        state = wait_for_query_to_complete(query_execution_id, athena_client)
+        if state != 'SUCCEEDED':
+            return None
+
+        if is_select:
+            row_count = read_query_results(query_execution_id, athena_output_bucket,
+                                           athena_client, region, prefix=result_prefix,
+                                           verbose=verbose)
+
+            # An unknown row count still means Athena wrote a result file
+            if row_count != 0:
+                print(f"Results stored with filename: '{result_prefix}{query_execution_id}.csv' "
+                      f"in bucket: '{athena_output_bucket}'")
+                return f"s3://{athena_output_bucket}/{result_prefix}{query_execution_id}.csv"
+            print("No data returned.")
         else:
             print("Non-SELECT query executed successfully. No results to store.")
+        return None
 
-    except ClientError as e:
+    except (ClientError, WaiterError) as e:
         print(f"Error executing Athena query: {e}")
         raise
 
 
-def wait_for_query_to_complete(query_execution_id, athena_client, sleep_time=2):
+def start_query(query, database_name, athena_output_bucket, athena_client, prefix=''):
+    """
+    Submits a query to Athena without waiting for it to complete.
+
+    Args:
+        query (str): The SQL query to execute.
+        database_name (str): The name of the Athena database.
+        athena_output_bucket (str): The S3 bucket to store query results.
+        athena_client (boto3.client): The Athena client.
+        prefix (str): The key prefix for the query's results. Defaults to the bucket root.
+
+    Returns:
+        str: The ID of the query execution.
+
+    Raises:
+        ClientError: If there's an issue submitting the query.
+    """
+    response = athena_client.start_query_execution(
+        QueryString=query,
+        QueryExecutionContext={'Database': database_name},
+        ResultConfiguration={'OutputLocation': f's3://{athena_output_bucket}/{prefix}'}
+    )
+    return response['QueryExecutionId']
+
+
+def get_query_waiter(athena_client):
+    """
+    Build a waiter that polls GetQueryExecution until the query reaches a terminal state.
+
+    Args:
+        athena_client (boto3.client): The Athena client.
+
+    Returns:
+        botocore.waiter.Waiter: The 'QueryCompleted' waiter.
+    """
+    return create_waiter_with_client('QueryCompleted', WaiterModel(QUERY_WAITER_CONFIG),
+                                     athena_client)
+
+
+def wait_for_query_to_complete(query_execution_id, athena_client, delay=1,
+                               max_attempts=QUERY_WAIT_MAX_ATTEMPTS):
     """
     Waits for the Athena query to complete.
 
+    If the query is still running once the status checks run out, it is stopped so that
+    it does not keep running (and scanning data) unattended.
+
     Args:
         query_execution_id (str): The ID of the query execution.
         athena_client (boto3.client): The Athena client.
-        sleep_time (int): Time to wait between status checks. Defaults to 2 seconds.
+        delay (int): Time to wait between status checks. Defaults to 1 second.
+        max_attempts (int): Maximum number of status checks. Defaults to 1800.
+
+    Returns:
+        str: The terminal state of the query ('SUCCEEDED', 'FAILED' or 'CANCELLED').
 
     Raises:
-        ClientError: If there's an issue checking the query status.
+        WaiterError: If the query does not finish in time or its status cannot be checked.
     """
-    while True:
-        try:
-            status = athena_client.get_query_execution(QueryExecutionId=query_execution_id)
-            state = status['QueryExecution']['Status']['State']
-            if state in ['SUCCEEDED', 'FAILED', 'CANCELLED']:
-                print(f"Athena query '{query_execution_id}' ended with state: {state}.")
-                if 'StateChangeReason' in status['QueryExecution']['Status']:
-                    print(f"Reason: {status['QueryExecution']['Status']['StateChangeReason']}")
-                break
-            print(f"Waiting for Athena query '{query_execution_id}' to complete...")
-            time.sleep(sleep_time)
-        except ClientError as e:
-            print(f"Error while checking status of query '{query_execution_id}': {e}")
+    waiter = get_query_waiter(athena_client)
+    try:
+        waiter.wait(
+            QueryExecutionId=query_execution_id,
+            WaiterConfig={'Delay': delay, 'MaxAttempts': max_attempts}
+        )
+    except WaiterError as e:
+        status = (e.last_response or {}).get('QueryExecution', {}).get('Status', {})
+        if status.get('State') in ['QUEUED', 'RUNNING']:
+            athena_client.stop_query_execution(QueryExecutionId=query_execution_id)
+            print(f"Athena query '{query_execution_id}' did not finish after "
+                  f"{delay * max_attempts} seconds and was stopped.")
+            raise
+        if status.get('State') not in ['FAILED', 'CANCELLED']:
             raise
+        print(f"Athena query '{query_execution_id}' ended with state: {status['State']}.")
+        if 'StateChangeReason' in status:
+            print(f"Reason: {status['StateChangeReason']}")
+        return status['State']
+    print(f"Athena query '{query_execution_id}' ended with state: SUCCEEDED.")
+    return 'SUCCEEDED'
 
 
-def get_query_results(query_execution_id, athena_client):
+def wait_for_queries_to_complete(query_execution_ids, athena_client, initial_delay=0.2,
+                                 max_delay=5.0):
     """
-    Retrieves and returns the results of a completed Athena query.
+    Waits for several Athena queries to complete, checking their status in batches.
+
+    Each status check covers up to BATCH_GET_QUERY_EXECUTION_LIMIT queries with a single
+    BatchGetQueryExecution call, backing off exponentially (with jitter) between checks.
+
+    Args:
+        query_execution_ids (list): The IDs of the query executions.
+        athena_client (boto3.client): The Athena client.
+        initial_delay (float): Delay before the second status check. Defaults to 0.2 seconds.
+        max_delay (float): Upper bound for the delay between status checks. Defaults to 5 seconds.
+
+    Returns:
+        dict: The final 'QueryExecution' description of each query, keyed by execution ID.
+
+    Raises:
+        ClientError: If there's an issue checking the query status.
+    """
+    pending = list(query_execution_ids)
+    completed = {}
+    delay = initial_delay
+    while pending:
+        for i in range(0, len(pending), BATCH_GET_QUERY_EXECUTION_LIMIT):
+            response = athena_client.batch_get_query_execution(
+                QueryExecutionIds=pending[i:i + BATCH_GET_QUERY_EXECUTION_LIMIT]
+            )
+            for query_execution in response['QueryExecutions']:
+                state = query_execution['Status']['State']
+                if state in ['SUCCEEDED', 'FAILED', 'CANCELLED']:
+                    query_execution_id = query_execution['QueryExecutionId']
+                    print(f"Athena query '{query_execution_id}' ended with state: {state}.")
+                    completed[query_execution_id] = query_execution
+        pending = [query_execution_id for query_execution_id in pending
+                   if query_execution_id not in completed]
+        if pending:
+            time.sleep(delay + random.uniform(0, delay * 0.1))
+            delay = min(delay * 2, max_delay)
+    return completed
+
+
+def read_query_results(query_execution_id, athena_output_bucket, athena_client,
+                       region='us-east-1', prefix='', verbose=False):
+    """
+    Reads the results of a completed Athena query from the CSV file Athena wrote to S3.
+
+    The result file is only downloaded when its rows are printed; otherwise the row count
+    comes from the query's runtime statistics. Streaming the result file is much cheaper
+    than paging through GetQueryResults, so get_query_results is only used if the result
+    file cannot be found.
 
     Args:
         query_execution_id (str): The ID of the query execution.
+        athena_output_bucket (str): The S3 bucket holding the query results.
         athena_client (boto3.client): The Athena client.
+        region (str): The AWS region. Defaults to 'us-east-1'.
+        prefix (str): The key prefix of the query's output location. Defaults to the bucket root.
+        verbose (bool): If True, print the result rows. Defaults to False.
 
     Returns:
-        list: The query results.
+        int or None: The number of result rows, excluding the header row, or None if it
+        could not be determined without downloading the results.
 
     Raises:
         ClientError: If there's an issue retrieving the query results.
     """
+    if not verbose:
+        return get_output_row_count(query_execution_id, athena_client)
     try:
-        paginator = athena_client.get_paginator('get_query_results')
-        pages = paginator.paginate(QueryExecutionId=query_execution_id)
-        results = []
-        print("Athena Query Results:")
-        for page in pages:
-            for row in page['ResultSet']['Rows']:
-                # Extract the data from each row
-                row_data = [col.get('VarCharValue', '') for col in row['Data']]
-                results.append(row_data)
-                print(row_data)
-        return results
+        row_count = read_results_file(athena_output_bucket, f"{prefix}{query_execution_id}.csv",
+                                      region, verbose)
     except ClientError as e:
-        print(f"Error retrieving results for query '{query_execution_id}': {e}")
-        raise
+        if e.response['Error']['Code'] != 'NoSuchKey':
+            raise
+        row_count = len(get_query_results(query_execution_id, athena_client, verbose))
+    return max(row_count - 1, 0)
 
 
-def store_query_results(query_execution_id, athena_output_bucket, clean_name):
+def get_output_row_count(query_execution_id, athena_client):
     """
-    Store the Athena query results with a cleaner name.
+    Looks up how many rows a completed query returned, without reading its results.
 
     Args:
         query_execution_id (str): The ID of the query execution.
-        athena_output_bucket (str): The S3 bucket to store query results.
-        clean_name (str): The clean name for the stored results.
+        athena_client (boto3.client): The Athena client.
+
+    Returns:
+        int or None: The number of output rows, or None if Athena does not report it.
+    """
+    try:
+        response = athena_client.get_query_runtime_statistics(
+            QueryExecutionId=query_execution_id)
+        return response['QueryRuntimeStatistics']['Rows']['OutputRows']
+    except (ClientError, KeyError):
+        return None
+
+
+def read_results_file(bucket_name, key, region='us-east-1', verbose=False):
+    """
+    Streams a query result CSV file from S3, optionally writing its rows to stdout.
+
+    Rows are parsed RESULT_BATCH_SIZE at a time, so memory use stays bounded no matter
+    how large the result file is.
+
+    Args:
+        bucket_name (str): The S3 bucket holding the result file.
+        key (str): The key of the result file.
+        region (str): The AWS region. Defaults to 'us-east-1'.
+        verbose (bool): If True, print the rows. Defaults to False.
+
+    Returns:
+        int: The number of rows in the result file, including the header row.
+
+    Raises:
+        ClientError: If there's an issue reading the result file.
+    """
+    s3_client, _ = get_s3_clients(region)
+    response = s3_client.get_object(Bucket=bucket_name, Key=key)
+    reader = csv.reader(io.TextIOWrapper(response['Body'], encoding='utf-8', newline=''))
+    row_count = 0
+    if verbose:
+        print("Athena Query Results:")
+    for rows in iter(lambda: list(itertools.islice(reader, RESULT_BATCH_SIZE)), []):
+        if verbose:
+            write_rows(rows)
+        row_count += len(rows)
+    return row_count
+
+
+def write_rows(rows):
+    """
+    Writes result rows to stdout with a single write call instead of one print per row.
+
+    Args:
+        rows (list): The rows to write.
+    """
+    if rows:
+        sys.stdout.write('\n'.join(map(str, rows)) + '\n')
+
+
+def get_query_results(query_execution_id, athena_client, verbose=False):
+    """
+    Retrieves and returns the results of a completed Athena query.
+
+    Each page is requested as soon as the previous page's NextToken is known, so the
+    round-trip for the next page overlaps with decoding the current one.
+
+    Args:
+        query_execution_id (str): The ID of the query execution.
+        athena_client (boto3.client): The Athena client.
+        verbose (bool): If True, print the result rows. Defaults to False.
+
+    Returns:
+        list: The query results.
 
     Raises:
-        ClientError: If there's an issue storing the query results.
+        ClientError: If there's an issue retrieving the query results.
     """
-    s3_client = get_s3_client()
-    copy_source = f"{athena_output_bucket}/{query_execution_id}.csv"
+    results = []
+    if verbose:
+        print("Athena Query Results:")
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        next_page = executor.submit(athena_client.get_query_results,
+                                    QueryExecutionId=query_execution_id)
+        while next_page:
+            page = next_page.result()
+            if 'NextToken' in page:
+                next_page = executor.submit(athena_client.get_query_results,
+                                            QueryExecutionId=query_execution_id,
+                                            NextToken=page['NextToken'])
+            else:
+                next_page = None
+
+            # Extract the data from each row
+            rows = [[col.get('VarCharValue', '') for col in row['Data']]
+                    for row in page['ResultSet']['Rows']]
+            results.extend(rows)
+            if verbose:
+                write_rows(rows)
+    return results
+
+
+def catalog_entry_exists(lookup, **kwargs):
+    """
+    Checks whether a database or table exists in the AWS data catalog.
+
+    Args:
+        lookup (callable): The Athena client method to call, e.g. get_database.
+        **kwargs: The lookup arguments, other than the catalog name.
 
+    Returns:
+        bool: True if the entry exists, False if Athena reports it missing.
+
+    Raises:
+        ClientError: If there's an issue looking up the entry.
+    """
     try:
-        # Copy the query results to a new name (cleaner format)
-        s3_client.copy_object(
-            Bucket=athena_output_bucket,
-            CopySource=copy_source,
-            Key=f"{clean_name}.csv"
-        )
+        lookup(CatalogName=DATA_CATALOG, **kwargs)
+        return True
     except ClientError as e:
-        print(f"Error storing query results: {e}")
+        if e.response['Error']['Code'] == 'MetadataException':
+            return False
         raise
 
 
@@ -158,6 +497,9 @@ def create_athena_database_and_table(database_name, table_name, data_bucket, reg
     """
     Creates a new database and table in Athena, dropping the table if it already exists.
 
+    The data catalog is checked first, so the CREATE DATABASE and DROP TABLE queries are
+    only run when they would change something.
+
     Args:
         database_name (str): The name of the Athena database.
         table_name (str): The name of the table to create.
@@ -168,14 +510,23 @@ def create_athena_database_and_table(database_name, table_name, data_bucket, reg
         ClientError: If there's an issue creating the database or table.
     """
     config = load_config()
+    athena_client = get_athena_client(region)
 
-    # Create database query
-    create_db_query = f"CREATE DATABASE IF NOT EXISTS {database_name}"
-    run_athena_query(create_db_query, database_name, config['athena_output_bucket'], region=region)
-
-    # Drop table if it exists
-    drop_table_query = f"DROP TABLE IF EXISTS {database_name}.{table_name}"
-    run_athena_query(drop_table_query, database_name, config['athena_output_bucket'], region=region)
+    if catalog_entry_exists(athena_client.get_database, DatabaseName=database_name):
+        table_exists = catalog_entry_exists(athena_client.get_table_metadata,
+                                            DatabaseName=database_name, TableName=table_name)
+    else:
+        # Create database query
+        create_db_query = f"CREATE DATABASE IF NOT EXISTS {database_name}"
+        run_athena_query(create_db_query, database_name, config['athena_output_bucket'],
+                         region=region)
+        table_exists = False
+
+    if table_exists:
+        # Drop table if it exists
+        drop_table_query = f"DROP TABLE IF EXISTS {database_name}.{table_name}"
+        run_athena_query(drop_table_query, database_name, config['athena_output_bucket'],
+                         region=region)
 
     # Create table query
     create_table_query = f"""
@@ -204,57 +555,71 @@ def create_athena_database_and_table(database_name, table_name, data_bucket, reg
                      region=region)
 
 
-def performance_test_select_query(query, database, output_bucket, iterations=5):
+def performance_test_select_query(query, database, output_bucket, iterations=5, max_workers=None,
+                                  warmup=True):
     """
     Run performance tests on Athena SELECT queries.
 
+    The iterations are submitted concurrently, since Athena runs independent query
+    executions in parallel, and their completion is tracked with batched status checks.
+    An optional untimed warmup run first brings the table metadata and data into a
+    warm state, so that the timed iterations measure comparable runs.
+
     Args:
         query (str): The SQL query to test.
         database (str): The Athena database.
         output_bucket (str): The S3 bucket to store query results.
         iterations (int): The number of times to run the query. Defaults to 5.
+        max_workers (int, optional): The maximum number of concurrent query submissions.
+            Defaults to submitting all iterations at once.
+        warmup (bool): Whether to run the query once, untimed, before the timed
+            iterations. Defaults to True.
 
     Returns:
-        dict: The average execution time and average scanned bytes.
+        dict: The average wall-clock execution time and average scanned bytes, along with
+        the average engine execution, query planning and total execution times reported
+        by Athena (in seconds).
 
     Raises:
         ClientError: If there's an issue executing the query.
     """
-    athena_client = boto3.client('athena')
+    athena_client = get_athena_client()
 
     total_execution_time = 0
     total_scanned_bytes = 0
-
-    for _ in range(iterations):
-        start_time = time.time()
-
-        response = athena_client.start_query_execution(
-            QueryString=query,
-            QueryExecutionContext={'Database': database},
-            ResultConfiguration={'OutputLocation': f's3://{output_bucket}/'}
-        )
-
-        query_execution_id = response['QueryExecutionId']
-
-        while True:
-            query_status = athena_client.get_query_execution(QueryExecutionId=query_execution_id)
-            status = query_status['QueryExecution']['Status']['State']
-            if status in ['SUCCEEDED', 'FAILED', 'CANCELLED']:
-                break
-            time.sleep(1)
-
-        end_time = time.time()
-        execution_time = end_time - start_time
-
-        if status == 'SUCCEEDED':
-            statistics = query_status['QueryExecution']['Statistics']
-            total_execution_time += execution_time
+    total_engine_time_ms = 0
+    total_planning_time_ms = 0
+    total_athena_time_ms = 0
+
+    if warmup:
+        warmup_id = start_query(query, database, output_bucket, athena_client)
+        wait_for_query_to_complete(warmup_id, athena_client)
+
+    with ThreadPoolExecutor(max_workers=max_workers or iterations) as executor:
+        futures = [executor.submit(start_query, query, database, output_bucket, athena_client)
+                   for _ in range(iterations)]
+        query_execution_ids = [future.result() for future in futures]
+
+    query_executions = wait_for_queries_to_complete(query_execution_ids, athena_client)
+
+    for query_execution in query_executions.values():
+        status = query_execution['Status']
+        if status['State'] == 'SUCCEEDED':
+            execution_time = status['CompletionDateTime'] - status['SubmissionDateTime']
+            total_execution_time += execution_time.total_seconds()
+            statistics = query_execution['Statistics']
             total_scanned_bytes += statistics['DataScannedInBytes']
+            total_engine_time_ms += statistics.get('EngineExecutionTimeInMillis', 0)
+            total_planning_time_ms += statistics.get('QueryPlanningTimeInMillis', 0)
+            total_athena_time_ms += statistics.get('TotalExecutionTimeInMillis', 0)
 
     avg_execution_time = total_execution_time / iterations
     avg_scanned_bytes = total_scanned_bytes / iterations
 
     return {
         'average_execution_time': avg_execution_time,
-        'average_scanned_bytes': avg_scanned_bytes
+        'average_scanned_bytes': avg_scanned_bytes,
+        'average_engine_execution_time': total_engine_time_ms / iterations / 1000,
+        'average_query_planning_time': total_planning_time_ms / iterations / 1000,
+        'average_total_execution_time': total_athena_time_ms / iterations / 1000
     }
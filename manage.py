@@ -8,14 +8,14 @@ run Athena queries, and more.
 
 import os
 import uuid
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
 
-import boto3
 import click
-from botocore.exceptions import ClientError
 
-from athena_module import *
-from s3_module import *
-from utils.helpers import load_config, save_config, get_default_bucket
+from utils.helpers import load_config, save_config, get_default_bucket, REGION_NAME
+
+# The AWS modules (boto3, botocore and everything built on them) are imported inside
+# the commands that use them, so that --help and group dispatch stay fast
 
 # Configuration Constants
 ATHENA_DATABASE = 'medical_db'
@@ -52,103 +52,80 @@ def athena():
     pass
 
 
+def run_in_parallel(executor, tasks):
+    """
+    Run tasks concurrently and wait for them, re-raising the first failure.
+
+    Args:
+        executor (ThreadPoolExecutor): The executor to run the tasks on.
+        tasks (list): A list of (function, *args) tuples.
+    """
+    futures = [executor.submit(func, *args) for func, *args in tasks]
+    done, _ = wait(futures, return_when=FIRST_EXCEPTION)
+    for future in done:
+        if future.exception():
+            raise future.exception()
+
+
+def configure_bucket(bucket_name, policy, region):
+    """
+    Apply versioning, lifecycle, access and encryption settings to a new bucket.
+
+    The settings are applied one after another, since S3 rejects concurrent
+    configuration changes to the same bucket.
+
+    Args:
+        bucket_name (str): The name of the bucket.
+        policy (str): The bucket policy to apply, as a JSON string.
+        region (str): The AWS region of the bucket.
+    """
+    from s3_module import (
+        enable_versioning, set_lifecycle_policy, set_bucket_policy, enable_encryption
+    )
+
+    enable_versioning(bucket_name, region)
+    set_lifecycle_policy(bucket_name, region)
+    set_bucket_policy(bucket_name, policy, region)
+    enable_encryption(bucket_name, region)
+
+
 @s3.command('setup')
 @click.option('--region', default=REGION_NAME, help='AWS region')
 def s3_setup(region):
     """
     Set up S3 buckets and Athena with granular policies.
     """
+    from s3_module import (
+        create_bucket, IMAGES_BUCKET_POLICY_TEMPLATE, DATA_BUCKET_POLICY_TEMPLATE,
+        ATHENA_OUTPUT_BUCKET_POLICY_TEMPLATE
+    )
+    from utils.aws_clients import create_client
+
     click.echo("Setting up S3 buckets and Athena...")
     images_bucket, data_bucket = generate_bucket_names()
-
-    create_bucket(images_bucket, region)
-    enable_versioning(images_bucket, region)
-
-    create_bucket(data_bucket, region)
-    enable_versioning(data_bucket, region)
-
-    set_lifecycle_policy(images_bucket, region)
-    set_lifecycle_policy(data_bucket, region)
-
-    # Get the account ID
-    sts_client = boto3.client('sts')
-    account_id = sts_client.get_caller_identity()["Account"]
-
-    images_bucket_policy = {
-        "Version": "2012-10-17",
-        "Statement": [
-            {
-                "Sid": "AllowImageUploadDownload",
-                "Effect": "Allow",
-                "Principal": {
-                    "AWS": f"arn:aws:iam::{account_id}:root"
-                },
-                "Action": [
-                    "s3:PutObject",
-                    "s3:GetObject"
-                ],
-                "Resource": [
-                    f"arn:aws:s3:::{images_bucket}/*"
-                ]
-            }
-        ]
-    }
-
-    data_bucket_policy = {
-        "Version": "2012-10-17",
-        "Statement": [
-            {
-                "Sid": "AllowAthenaAccessToDataBucket",
-                "Effect": "Allow",
-                "Principal": {
-                    "Service": "athena.amazonaws.com"
-                },
-                "Action": [
-                    "s3:GetBucketLocation",
-                    "s3:GetObject",
-                    "s3:ListBucket"
-                ],
-                "Resource": [
-                    f"arn:aws:s3:::{data_bucket}",
-                    f"arn:aws:s3:::{data_bucket}/*"
-                ]
-            }
-        ]
-    }
-
-    set_bucket_policy(images_bucket, images_bucket_policy, region)
-    set_bucket_policy(data_bucket, data_bucket_policy, region)
-
-    enable_encryption(images_bucket, region)
-    enable_encryption(data_bucket, region)
-
     athena_output_bucket = f'athena-query-results-{uuid.uuid4()}'
-    create_bucket(athena_output_bucket, region)
-    enable_versioning(athena_output_bucket, region)
-
-    athena_output_bucket_policy = {
-        "Version": "2012-10-17",
-        "Statement": [
-            {
-                "Sid": "AllowAthenaWriteResults",
-                "Effect": "Allow",
-                "Principal": {
-                    "Service": "athena.amazonaws.com"
-                },
-                "Action": [
-                    "s3:PutObject",
-                    "s3:GetObject"
-                ],
-                "Resource": [
-                    f"arn:aws:s3:::{athena_output_bucket}/*"
-                ]
-            }
-        ]
-    }
 
-    set_lifecycle_policy(athena_output_bucket, region)
-    set_bucket_policy(athena_output_bucket, athena_output_bucket_policy, region)
-    enable_encryption(athena_output_bucket, region)
+    buckets = (images_bucket, data_bucket, athena_output_bucket)
+    sts_client = create_client('sts')
+
+    # The three buckets are independent, so they are created and then configured in
+    # parallel; each bucket must exist before it can be configured. The account ID is
+    # only needed for the policies, so it is looked up while the buckets are created.
+    with ThreadPoolExecutor(max_workers=len(buckets) + 1) as executor:
+        account_future = executor.submit(sts_client.get_caller_identity)
+        run_in_parallel(executor, [(create_bucket, bucket, region)
+                                   for bucket in buckets])
+        account_id = account_future.result()["Account"]
+
+        bucket_policies = {
+            images_bucket: IMAGES_BUCKET_POLICY_TEMPLATE.substitute(
+                bucket=images_bucket, account_id=account_id),
+            data_bucket: DATA_BUCKET_POLICY_TEMPLATE.substitute(bucket=data_bucket),
+            athena_output_bucket: ATHENA_OUTPUT_BUCKET_POLICY_TEMPLATE.substitute(
+                bucket=athena_output_bucket)
+        }
+        run_in_parallel(executor, [(configure_bucket, bucket, policy, region)
+                                   for bucket, policy in bucket_policies.items()])
 
     config_data = {
         "images_bucket": images_bucket,
@@ -162,21 +139,25 @@ def s3_setup(region):
 
 @s3.command('delete-bucket')
 @click.argument('bucket_names', nargs=-1, type=click.STRING, required=True)
-def delete_bucket_command(bucket_names):
+@click.option('--max-workers', default=16, help='Maximum number of buckets to delete at once')
+def delete_bucket_command(bucket_names, max_workers):
     """
     Delete one or more S3 buckets.
 
     Args:
         bucket_names (tuple): The names of the buckets to delete.
+        max_workers (int): The maximum number of buckets to delete at once.
     """
-    results = delete_multiple_buckets(bucket_names)
-    for result in results:
-        click.echo(result)
-        if "has been deleted" in result:
-            bucket_name = result.split("'")[1]  # Extract bucket name from the success message
-            config_update = update_config_after_deletion(bucket_name)
-            if config_update:
-                click.echo(config_update)
+    from s3_module import delete_multiple_buckets, update_config_after_bulk_deletion
+
+    results = delete_multiple_buckets(bucket_names, max_workers=max_workers)
+    for _, _, message in results:
+        click.echo(message)
+
+    config_update = update_config_after_bulk_deletion(
+        [bucket_name for bucket_name, deleted, _ in results if deleted])
+    if config_update:
+        click.echo(config_update)
 
 
 @s3.command('list-buckets')
@@ -190,6 +171,8 @@ def s3_list_buckets(nodate, collection):
         nodate (bool): Flag to list buckets without creation dates.
         collection (bool): Flag to output bucket names as a space-separated list.
     """
+    from s3_module import list_buckets
+
     result = list_buckets(nodate, collection)
     click.echo(result)
 
@@ -203,6 +186,8 @@ def list_contents(bucket_name):
     Args:
         bucket_name (str): The name of the bucket.
     """
+    from s3_module import list_bucket_contents
+
     list_bucket_contents(bucket_name)
 
 
@@ -217,6 +202,8 @@ def upload(filename, bucket):
         filename (str): The name of the file to upload.
         bucket (str): The name of the bucket to upload to.
     """
+    from s3_module import upload_file
+
     config_data = load_config()
     if not bucket:
         bucket = get_default_bucket(filename, config_data)
@@ -225,6 +212,36 @@ def upload(filename, bucket):
     click.echo(f"Uploaded {filename} to {bucket}")
 
 
+@s3.command('upload-many')
+@click.argument('filenames', nargs=-1, required=True)
+@click.option('--bucket', help='Specify a bucket to override automatic selection')
+@click.option('--max-workers', type=int, help='Maximum number of concurrent uploads')
+def upload_many(filenames, bucket, max_workers):
+    """
+    Upload several files at once, each to its appropriate bucket.
+
+    Args:
+        filenames (tuple): The names of the files to upload.
+        bucket (str): The name of the bucket to upload all files to.
+        max_workers (int): The maximum number of concurrent uploads.
+    """
+    from s3_module import upload_files
+
+    config_data = load_config()
+    files_by_bucket = {}
+    for filename in filenames:
+        target = bucket or get_default_bucket(filename, config_data)
+        files_by_bucket.setdefault(target, []).append(filename)
+
+    failed = 0
+    for target, files in files_by_bucket.items():
+        failures = upload_files(files, target, max_workers)
+        failed += len(failures)
+        click.echo(f"Uploaded {len(files) - len(failures)} of {len(files)} file(s) to {target}")
+    if failed:
+        click.echo(f"{failed} file(s) failed to upload.")
+
+
 @s3.command('delete-file')
 @click.argument('filename')
 def delete_file(filename):
@@ -234,8 +251,11 @@ def delete_file(filename):
     Args:
         filename (str): The name of the file to delete.
     """
+    from botocore.exceptions import ClientError
+    from s3_module import get_s3_clients
+
     config_data = load_config()
-    s3_client = boto3.client('s3')
+    s3_client, _ = get_s3_clients()
     try:
         s3_client.delete_object(Bucket=config_data['data_bucket'], Key=filename)
         click.echo(f"Created delete marker for {filename} in {config_data['data_bucket']}")
@@ -254,33 +274,24 @@ def restore_version(filename, version_id):
         filename (str): The name of the file.
         version_id (str): The version ID to restore.
     """
+    from botocore.exceptions import ClientError
+    from s3_module import get_s3_clients
+
     config_data = load_config()
-    s3_client = boto3.client('s3')
+    s3_client, _ = get_s3_clients()
     bucket_name = config_data['data_bucket']
     try:
-        # List object versions to check if the specified version exists
-        versions = s3_client.list_object_versions(Bucket=bucket_name, Prefix=filename)
-
-        # Check if the specified version exists
-        version_exists = any(v['VersionId'] == version_id for v in versions.get('Versions', []))
-        if not version_exists:
-            click.echo(f"Version {version_id} of {filename} does not exist.")
-            return
-
-        # Check if there's a delete marker
-        delete_marker = next((m for m in versions.get('DeleteMarkers', []) if m['IsLatest']), None)
-        if delete_marker:
-            # If there's a delete marker, remove it
-            s3_client.delete_object(Bucket=bucket_name, Key=filename,
-                                    VersionId=delete_marker['VersionId'])
-            click.echo(f"Removed delete marker for {filename}")
-
-        # Copy the specified version to make it the latest
+        # Copying the version over the key makes it the latest, superseding any
+        # delete marker, so no existence check or marker removal is needed
         copy_source = {'Bucket': bucket_name, 'Key': filename, 'VersionId': version_id}
-        s3_client.copy_object(Bucket=bucket_name, CopySource=copy_source, Key=filename)
+        s3_client.copy_object(Bucket=bucket_name, CopySource=copy_source, Key=filename,
+                              MetadataDirective='COPY')
         click.echo(f"Restored version {version_id} of {filename}")
     except ClientError as e:
-        click.echo(f"Error restoring version {version_id} of {filename}: {str(e)}")
+        if e.response['Error']['Code'] in ('NoSuchVersion', 'NoSuchKey'):
+            click.echo(f"Version {version_id} of {filename} does not exist.")
+        else:
+            click.echo(f"Error restoring version {version_id} of {filename}: {str(e)}")
 
 
 @s3.command('list-versions')
@@ -292,84 +303,114 @@ def list_versions(filename):
     Args:
         filename (str): The name of the file.
     """
+    from botocore.exceptions import ClientError
+    from s3_module import get_s3_clients
+
     config_data = load_config()
-    s3_client = boto3.client('s3')
+    s3_client, _ = get_s3_clients()
     bucket_name = config_data['data_bucket']
     try:
-        versions = s3_client.list_object_versions(Bucket=bucket_name, Prefix=filename)
+        paginator = s3_client.get_paginator('list_object_versions')
         click.echo(f"Versions of {filename}:")
-        for version in versions.get('Versions', []):
-            click.echo(
-                f"Version ID: {version['VersionId']}, Last Modified: {version['LastModified']}")
-        for marker in versions.get('DeleteMarkers', []):
-            click.echo(
-                f"Delete Marker: {marker['VersionId']}, Last Modified: {marker['LastModified']}")
+        for page in paginator.paginate(Bucket=bucket_name, Prefix=filename):
+            for version in page.get('Versions', []):
+                click.echo(
+                    f"Version ID: {version['VersionId']}, Last Modified: {version['LastModified']}")
+            for marker in page.get('DeleteMarkers', []):
+                click.echo(
+                    f"Delete Marker: {marker['VersionId']}, Last Modified: {marker['LastModified']}")
     except ClientError as e:
         click.echo(f"Error listing versions of {filename}: {e}")
 
 
 @s3.command('generate-presigned-url')
-@click.argument('filename')
+@click.argument('filenames', nargs=-1, required=True)
 @click.option('--expiration', default=3600, help='Expiration time in seconds')
 @click.option('--bucket', help='Specify a bucket to override automatic selection')
-def generate_presigned_url(filename, expiration, bucket):
+def generate_presigned_url(filenames, expiration, bucket):
     """
-    Generate a presigned URL for a file.
+    Generate presigned URLs for one or more files.
 
     Args:
-        filename (str): The name of the file.
+        filenames (tuple): The names of the files.
         expiration (int): The expiration time in seconds.
-        bucket (str): The name of the bucket.
+        bucket (str): The name of the bucket to use for every file.
     """
-    config_data = load_config()
-    s3_client = boto3.client('s3')
-
-    if not bucket:
-        bucket = get_default_bucket(filename, config_data)
+    from botocore.exceptions import ClientError
+    from s3_module import get_s3_clients
 
-    try:
-        url = s3_client.generate_presigned_url(
-            'get_object',
-            Params={'Bucket': bucket, 'Key': filename},
-            ExpiresIn=expiration
-        )
-        click.echo(
-            f"Presigned URL for {filename} in bucket {bucket} (expires in {expiration} seconds):\n{url}")
-    except ClientError as e:
-        click.echo(f"Error generating presigned URL: {str(e)}")
+    config_data = load_config()
+    # One client signs every URL, so credentials are resolved only once
+    s3_client, _ = get_s3_clients()
+
+    for filename in filenames:
+        file_bucket = bucket or get_default_bucket(filename, config_data)
+        try:
+            url = s3_client.generate_presigned_url(
+                'get_object',
+                Params={'Bucket': file_bucket, 'Key': filename},
+                ExpiresIn=expiration
+            )
+            click.echo(
+                f"Presigned URL for {filename} in bucket {file_bucket} "
+                f"(expires in {expiration} seconds):\n{url}")
+        except ClientError as e:
+            click.echo(f"Error generating presigned URL for {filename}: {str(e)}")
 
 
 @athena.command('performance-test')
 @click.argument('query')
 @click.option('--iterations', default=5, help='Number of iterations for performance testing')
-def athena_performance_test(query, iterations):
+@click.option('--max-workers', type=int, help='Maximum number of concurrent query submissions')
+@click.option('--warmup/--no-warmup', default=True,
+              help='Run the query once, untimed, before the timed iterations')
+def athena_performance_test(query, iterations, max_workers, warmup):
     """
     Run performance tests on Athena SELECT queries.
 
     Args:
         query (str): The SQL query to test.
         iterations (int): The number of times to run the query.
+        max_workers (int): The maximum number of concurrent query submissions.
+        warmup (bool): Flag to run an untimed warmup query first.
     """
+    from athena_module import performance_test_select_query
+
     config_data = load_config()
     results = performance_test_select_query(query, ATHENA_DATABASE,
-                                            config_data['athena_output_bucket'], iterations)
+                                            config_data['athena_output_bucket'], iterations,
+                                            max_workers, warmup)
 
     click.echo(f"Query: {query}")
     click.echo(f"Average execution time: {results['average_execution_time']:.2f} seconds")
+    click.echo(f"Average engine execution time: "
+               f"{results['average_engine_execution_time']:.2f} seconds")
+    click.echo(f"Average query planning time: "
+               f"{results['average_query_planning_time']:.2f} seconds")
+    click.echo(f"Average total execution time (Athena): "
+               f"{results['average_total_execution_time']:.2f} seconds")
     click.echo(f"Average data scanned: {results['average_scanned_bytes'] / 1024:.2f} KB")
 
 
 @athena.command('run-query')
 @click.argument('query')
-def run_query(query):
+@click.option('--cache/--no-cache', default=False,
+              help='Reuse the results of an identical recent SELECT query')
+@click.option('--quiet', is_flag=True, help='Do not print the rows returned by the query')
+def run_query(query, cache, quiet):
     """
     Run an Athena query.
 
     Args:
         query (str): The SQL query to run.
+        cache (bool): Flag to reuse cached results of an identical SELECT query.
+        quiet (bool): Flag to skip printing the rows returned by the query.
     """
+    from athena_module import run_athena_query
+
     config_data = load_config()
-    run_athena_query(query, ATHENA_DATABASE, config_data['athena_output_bucket'])
+    run_athena_query(query, ATHENA_DATABASE, config_data['athena_output_bucket'],
+                     use_cache=cache, verbose=not quiet)
     click.echo(f"Athena query executed.")
 
 
@@ -386,6 +427,8 @@ def download(filename, bucket, region):
         bucket (str): The name of the bucket to download from.
         region (str): The AWS region.
     """
+    from s3_module import download_file
+
     config_data = load_config()
     if not bucket:
         bucket = get_default_bucket(filename, config_data)
@@ -404,6 +447,8 @@ def setup_athena(region):
     Args:
         region (str): The AWS region.
     """
+    from athena_module import create_athena_database_and_table
+
     config_data = load_config()
     data_bucket = config_data['data_bucket']
 
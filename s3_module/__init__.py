@@ -1,5 +1,17 @@
 from .s3_operations import (
-    create_bucket, delete_bucket, delete_multiple_buckets, upload_file, download_file,
-    enable_versioning, set_lifecycle_policy, set_bucket_policy, list_bucket_contents, list_buckets,
-    enable_encryption, get_s3_clients, update_config_after_deletion, REGION_NAME
+    create_bucket, delete_bucket, delete_multiple_buckets, upload_file, upload_files,
+    download_file, enable_versioning, set_lifecycle_policy, set_bucket_policy,
+    list_bucket_contents, list_buckets, enable_encryption, get_s3_clients,
+    update_config_after_deletion, update_config_after_bulk_deletion, REGION_NAME,
+    IMAGES_BUCKET_POLICY_TEMPLATE, DATA_BUCKET_POLICY_TEMPLATE,
+    ATHENA_OUTPUT_BUCKET_POLICY_TEMPLATE
 )
+
+__all__ = [
+    'create_bucket', 'delete_bucket', 'delete_multiple_buckets', 'upload_file', 'upload_files',
+    'download_file', 'enable_versioning', 'set_lifecycle_policy', 'set_bucket_policy',
+    'list_bucket_contents', 'list_buckets', 'enable_encryption', 'get_s3_clients',
+    'update_config_after_deletion', 'update_config_after_bulk_deletion', 'REGION_NAME',
+    'IMAGES_BUCKET_POLICY_TEMPLATE', 'DATA_BUCKET_POLICY_TEMPLATE',
+    'ATHENA_OUTPUT_BUCKET_POLICY_TEMPLATE'
+]
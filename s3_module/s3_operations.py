@@ -6,109 +6,342 @@ It includes functionalities to create, delete, and manage S3 buckets and objects
 with a focus on healthcare data management and compliance with PHIPA regulations.
 """
 
-import json
+import copy
+import functools
+import itertools
+import mimetypes
 import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from string import Template
 
-import boto3
+from boto3.s3.transfer import TransferConfig, create_transfer_manager
 from botocore.config import Config
-from botocore.exceptions import ClientError
-
-from utils.helpers import load_config, save_config
+from botocore.exceptions import BotoCoreError, ClientError
+
+from utils.aws_clients import create_client, create_resource
+from utils.helpers import load_config, save_config, dump_compact_json, REGION_NAME
+
+S3_CLIENT_CONFIG = Config(
+    signature_version='s3v4',
+    max_pool_connections=50,
+    tcp_keepalive=True,
+    retries={
+        'max_attempts': 10,
+        'mode': 'adaptive'
+    }
+)
+
+S3_FAST_CLIENT_CONFIG = S3_CLIENT_CONFIG.merge(Config(parameter_validation=False))
+
+# Files under the threshold go up in a single PUT; larger ones in 50 MiB parts
+UPLOAD_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024,
+    multipart_chunksize=50 * 1024 * 1024,
+    max_concurrency=10,
+    use_threads=True
+)
+
+# CRC32 is computed by zlib in C, unlike the per-part MD5 sent by default
+UPLOAD_CHECKSUM_ALGORITHM = 'CRC32'
+
+CONTENT_TYPES = {
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.csv': 'text/csv',
+    '.json': 'application/json',
+    '.txt': 'text/plain'
+}
+
+LIFECYCLE_CONFIGURATION = {
+    'Rules': [
+        {
+            'ID': 'Healthcare data lifecycle policy',
+            'Status': 'Enabled',
+            'Filter': {'Prefix': ''},
+            'Transitions': [
+                {
+                    'Days': 60,
+                    'StorageClass': 'INTELLIGENT_TIERING'
+                },
+                {
+                    'Days': 365,
+                    'StorageClass': 'GLACIER'
+                },
+                {
+                    'Days': 2555,  # ~7 years
+                    'StorageClass': 'DEEP_ARCHIVE'
+                }
+            ],
+            'NoncurrentVersionTransitions': [
+                {
+                    'NoncurrentDays': 60,
+                    'StorageClass': 'INTELLIGENT_TIERING'
+                },
+                {
+                    'NoncurrentDays': 365,
+                    'StorageClass': 'GLACIER'
+                }
+            ],
+            'NoncurrentVersionExpiration': {
+                'NoncurrentDays': 2555  # ~7 years
+            },
+            'AbortIncompleteMultipartUpload': {
+                'DaysAfterInitiation': 7
+            }
+        }
+    ]
+}
+
+ENCRYPTION_CONFIGURATION = {
+    'Rules': [
+        {'ApplyServerSideEncryptionByDefault': {'SSEAlgorithm': 'AES256'}}
+    ]
+}
+
+# Bucket policies are serialized once; set_bucket_policy sends the substituted string as-is
+IMAGES_BUCKET_POLICY_TEMPLATE = Template(dump_compact_json({
+    "Version": "2012-10-17",
+    "Statement": [
+        {
+            "Sid": "AllowImageUploadDownload",
+            "Effect": "Allow",
+            "Principal": {
+                "AWS": "arn:aws:iam::${account_id}:root"
+            },
+            "Action": [
+                "s3:PutObject",
+                "s3:GetObject"
+            ],
+            "Resource": [
+                "arn:aws:s3:::${bucket}/*"
+            ]
+        }
+    ]
+}))
+
+DATA_BUCKET_POLICY_TEMPLATE = Template(dump_compact_json({
+    "Version": "2012-10-17",
+    "Statement": [
+        {
+            "Sid": "AllowAthenaAccessToDataBucket",
+            "Effect": "Allow",
+            "Principal": {
+                "Service": "athena.amazonaws.com"
+            },
+            "Action": [
+                "s3:GetBucketLocation",
+                "s3:GetObject",
+                "s3:ListBucket"
+            ],
+            "Resource": [
+                "arn:aws:s3:::${bucket}",
+                "arn:aws:s3:::${bucket}/*"
+            ]
+        }
+    ]
+}))
+
+ATHENA_OUTPUT_BUCKET_POLICY_TEMPLATE = Template(dump_compact_json({
+    "Version": "2012-10-17",
+    "Statement": [
+        {
+            "Sid": "AllowAthenaWriteResults",
+            "Effect": "Allow",
+            "Principal": {
+                "Service": "athena.amazonaws.com"
+            },
+            "Action": [
+                "s3:PutObject",
+                "s3:GetObject"
+            ],
+            "Resource": [
+                "arn:aws:s3:::${bucket}/*"
+            ]
+        }
+    ]
+}))
 
-REGION_NAME = 'us-east-1'
+# delete_objects accepts at most 1000 keys per request
+DELETE_OBJECTS_LIMIT = 1000
+DELETE_OBJECTS_WORKERS = 4
+DELETE_OBJECTS_IN_FLIGHT = 2 * DELETE_OBJECTS_WORKERS
+DELETE_BUCKETS_WORKERS = 16
 
 
 def get_s3_clients(region=REGION_NAME):
     """
-    Initialize and return S3 client and resource.
+    Initialize and return S3 client and resource, reusing them across calls for the same region.
 
     Args:
-        region (str): The AWS region to connect to. Defaults to 'us-east-1'.
+        region (str): The AWS region to connect to. Defaults to 'us-east-1'; None is
+            treated the same way.
 
     Returns:
         tuple: A tuple containing the S3 client and S3 resource objects.
     """
-    config = Config(
-        region_name=region,
-        signature_version='s3v4',
-        retries={
-            'max_attempts': 10,
-            'mode': 'standard'
-        }
-    )
-    s3_client = boto3.client('s3', config=config)
-    s3_resource = boto3.resource('s3', config=config)
+    # The cache is keyed on the resolved region, so every way of asking for the same
+    # region shares one client and connection pool
+    return _cached_s3_clients(region or REGION_NAME)
+
+
+@functools.lru_cache(maxsize=None)
+def _cached_s3_clients(region):
+    s3_client = create_client('s3', region_name=region, config=S3_CLIENT_CONFIG)
+    s3_resource = create_resource('s3', region_name=region, config=S3_CLIENT_CONFIG)
     return s3_client, s3_resource
 
 
+def get_fast_s3_client(region=REGION_NAME):
+    """
+    Initialize and return an S3 client that skips client-side parameter validation.
+
+    Only meant for bucket configuration calls whose payloads are built in code;
+    requests built from user input should use get_s3_clients.
+
+    Args:
+        region (str): The AWS region to connect to. Defaults to 'us-east-1'; None is
+            treated the same way.
+
+    Returns:
+        boto3.client: The S3 client.
+    """
+    return _cached_fast_s3_client(region or REGION_NAME)
+
+
+@functools.lru_cache(maxsize=None)
+def _cached_fast_s3_client(region):
+    return create_client('s3', region_name=region, config=S3_FAST_CLIENT_CONFIG)
+
+
 def create_bucket(bucket_name, region=REGION_NAME):
     """
     Creates a new S3 bucket if it doesn't already exist.
 
+    The bucket is created directly; a bucket this account already owns is reported
+    by S3 as BucketAlreadyOwnedByYou, which makes an upfront existence check unnecessary.
+
     Args:
         bucket_name (str): The name of the bucket to create.
         region (str): The AWS region for the bucket. Defaults to 'us-east-1'.
 
     Raises:
-        ClientError: If there's an issue with bucket creation or checking.
+        ClientError: If there's an issue with bucket creation, including the name
+            being taken by another account.
     """
     s3_client, _ = get_s3_clients(region)
     try:
-        s3_client.head_bucket(Bucket=bucket_name)
-        print(f"Bucket '{bucket_name}' already exists.")
+        if region == 'us-east-1':
+            s3_client.create_bucket(Bucket=bucket_name)
+        else:
+            s3_client.create_bucket(
+                Bucket=bucket_name,
+                CreateBucketConfiguration={'LocationConstraint': region}
+            )
+        print(f"Bucket '{bucket_name}' created successfully.")
     except ClientError as e:
-        error_code = int(e.response['Error']['Code'])
-        if error_code == 404:
-            if region == 'us-east-1':
-                s3_client.create_bucket(Bucket=bucket_name)
-            else:
-                s3_client.create_bucket(
-                    Bucket=bucket_name,
-                    CreateBucketConfiguration={'LocationConstraint': region}
-                )
-            print(f"Bucket '{bucket_name}' created successfully.")
+        if e.response['Error']['Code'] == 'BucketAlreadyOwnedByYou':
+            print(f"Bucket '{bucket_name}' already exists.")
         else:
-            print(f"Error checking bucket '{bucket_name}': {e}")
+            print(f"Error creating bucket '{bucket_name}': {e}")
             raise
 
 
-def delete_bucket(bucket_name, region=None):
+def iter_object_version_batches(s3_client, bucket_name):
+    """
+    Yield every object version and delete marker in a bucket, in delete_objects-sized batches.
+
+    Args:
+        s3_client (boto3.client): The S3 client to list versions with.
+        bucket_name (str): The name of the bucket.
+
+    Yields:
+        list: Up to DELETE_OBJECTS_LIMIT {'Key', 'VersionId'} identifiers.
+    """
+    batch = []
+    paginator = s3_client.get_paginator('list_object_versions')
+    for page in paginator.paginate(Bucket=bucket_name):
+        for version in page.get('Versions', []) + page.get('DeleteMarkers', []):
+            batch.append({'Key': version['Key'], 'VersionId': version['VersionId']})
+            if len(batch) == DELETE_OBJECTS_LIMIT:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def delete_object_versions(s3_client, bucket_name):
+    """
+    Delete every object version and delete marker in a bucket.
+
+    Batches are deleted concurrently while the listing continues. At most
+    DELETE_OBJECTS_IN_FLIGHT batches are queued at a time, which bounds memory
+    and keeps the request rate within S3's per-prefix DELETE limit.
+
+    Args:
+        s3_client (boto3.client): The S3 client to use.
+        bucket_name (str): The name of the bucket to empty.
+
+    Raises:
+        ClientError: If listing or deleting a batch fails.
+    """
+    in_flight = threading.BoundedSemaphore(DELETE_OBJECTS_IN_FLIGHT)
+    futures = []
+    with ThreadPoolExecutor(max_workers=DELETE_OBJECTS_WORKERS) as executor:
+        for batch in iter_object_version_batches(s3_client, bucket_name):
+            in_flight.acquire()
+            future = executor.submit(s3_client.delete_objects, Bucket=bucket_name,
+                                     Delete={'Objects': batch, 'Quiet': True})
+            future.add_done_callback(lambda _: in_flight.release())
+            futures.append(future)
+
+    # Raise the first failed batch, if any
+    for future in futures:
+        future.result()
+
+
+def delete_bucket(bucket_name, region=None, s3_client=None):
     """
     Delete a single S3 bucket.
 
     Args:
         bucket_name (str): The name of the bucket to delete.
         region (str, optional): The AWS region of the bucket.
+        s3_client (boto3.client, optional): The S3 client to use. Defaults to the
+            cached client for the region.
 
     Returns:
-        str: A message indicating the result of the deletion attempt.
+        tuple: The bucket name, whether the deletion succeeded, and a message
+            describing the result.
     """
-    s3_client = boto3.client('s3', region_name=region)
+    if s3_client is None:
+        s3_client, _ = get_s3_clients(region)
     try:
-        bucket = boto3.resource('s3', region_name=region).Bucket(bucket_name)
-        bucket.object_versions.delete()
+        delete_object_versions(s3_client, bucket_name)
         s3_client.delete_bucket(Bucket=bucket_name)
-        return f"Bucket '{bucket_name}' has been deleted."
+        return bucket_name, True, f"Bucket '{bucket_name}' has been deleted."
     except ClientError as e:
-        return f"Error deleting bucket '{bucket_name}': {str(e)}"
+        return bucket_name, False, f"Error deleting bucket '{bucket_name}': {str(e)}"
 
 
-def delete_multiple_buckets(bucket_names, region=None):
+def delete_multiple_buckets(bucket_names, region=None, max_workers=DELETE_BUCKETS_WORKERS):
     """
-    Delete multiple S3 buckets.
+    Delete multiple S3 buckets concurrently.
 
     Args:
         bucket_names (list): A list of bucket names to delete.
         region (str, optional): The AWS region of the buckets.
+        max_workers (int): The maximum number of buckets to delete at once. Defaults to 16.
 
     Returns:
-        list: A list of messages indicating the result of each deletion attempt.
+        list: A (bucket name, success, message) tuple for each deletion attempt.
     """
-    results = []
-    for bucket_name in bucket_names:
-        result = delete_bucket(bucket_name, region)
-        results.append(result)
-    return results
+    # Clients are thread-safe, so every worker shares the one cached client
+    s3_client, _ = get_s3_clients(region)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(
+            lambda bucket_name: delete_bucket(bucket_name, region, s3_client), bucket_names))
 
 
 def update_config_after_deletion(bucket_name):
@@ -121,16 +354,46 @@ def update_config_after_deletion(bucket_name):
     Returns:
         str or None: A message if the config was updated, None otherwise.
     """
+    return update_config_after_bulk_deletion([bucket_name])
+
+
+def update_config_after_bulk_deletion(bucket_names):
+    """
+    Update the config file once after deleting several buckets.
+
+    Args:
+        bucket_names (list): The names of the deleted buckets.
+
+    Returns:
+        str or None: A message if the config was updated, None otherwise.
+    """
+    if not bucket_names:
+        return None
     config_data = load_config()
-    if bucket_name in config_data.values():
-        for key, value in config_data.items():
-            if value == bucket_name:
-                config_data[key] = None
-        save_config(config_data)
+    keys_by_bucket = {value: key for key, value in config_data.items()}
+    matched_keys = [keys_by_bucket[name] for name in bucket_names if name in keys_by_bucket]
+    if matched_keys:
+        # Build a new dict rather than mutating the one cached by load_config
+        save_config({**config_data, **dict.fromkeys(matched_keys)})
         return "Config file updated."
     return None
 
 
+def get_content_type(file_name):
+    """
+    Determine the content type to upload a file with.
+
+    Args:
+        file_name (str): The name of the file.
+
+    Returns:
+        str: The content type, or 'binary/octet-stream' if it cannot be determined.
+    """
+    extension = os.path.splitext(file_name)[1].lower()
+    return (CONTENT_TYPES.get(extension) or mimetypes.guess_type(file_name)[0]
+            or 'binary/octet-stream')
+
+
 def upload_file(file_path, bucket_name, object_name=None):
     """
     Uploads a file to the specified S3 bucket.
@@ -148,18 +411,15 @@ def upload_file(file_path, bucket_name, object_name=None):
     if object_name is None:
         object_name = file_name
     try:
-        if file_name.lower().endswith('.jpg') or file_name.lower().endswith('.jpeg'):
-            content_type = 'image/jpeg'
-        elif file_name.lower().endswith('.csv'):
-            content_type = 'text/csv'
-        else:
-            content_type = 'binary/octet-stream'
+        content_type = get_content_type(file_name)
 
         s3_client.upload_file(
             Filename=file_path,
             Bucket=bucket_name,
             Key=object_name,
-            ExtraArgs={'ContentType': content_type}
+            ExtraArgs={'ContentType': content_type,
+                       'ChecksumAlgorithm': UPLOAD_CHECKSUM_ALGORITHM},
+            Config=UPLOAD_TRANSFER_CONFIG
         )
         print(f"File '{file_name}' uploaded successfully as '{object_name}'.")
     except ClientError as e:
@@ -167,6 +427,50 @@ def upload_file(file_path, bucket_name, object_name=None):
         raise
 
 
+def upload_files(file_paths, bucket_name, max_concurrency=None):
+    """
+    Uploads several files to the specified S3 bucket concurrently.
+
+    All uploads share one S3 client and its connection pool. A failed upload does
+    not stop the others; failures are reported per file instead.
+
+    Args:
+        file_paths (list): The local paths of the files to be uploaded.
+        bucket_name (str): The name of the destination S3 bucket.
+        max_concurrency (int, optional): The maximum number of concurrent transfers.
+            Defaults to the limit in UPLOAD_TRANSFER_CONFIG.
+
+    Returns:
+        list: A (file path, error message) tuple for each upload that failed.
+    """
+    s3_client, _ = get_s3_clients()
+    transfer_config = UPLOAD_TRANSFER_CONFIG
+    if max_concurrency is not None:
+        transfer_config = copy.copy(UPLOAD_TRANSFER_CONFIG)
+        transfer_config.max_concurrency = max_concurrency
+
+    # A list rather than a dict, so files sharing a base name each keep their future
+    uploads = []
+    failures = []
+    with create_transfer_manager(s3_client, transfer_config) as manager:
+        for file_path in file_paths:
+            file_name = os.path.basename(file_path)
+            uploads.append((file_path, manager.upload(
+                file_path, bucket_name, file_name,
+                extra_args={'ContentType': get_content_type(file_name),
+                            'ChecksumAlgorithm': UPLOAD_CHECKSUM_ALGORITHM})))
+
+        for file_path, future in uploads:
+            file_name = os.path.basename(file_path)
+            try:
+                future.result()
+                print(f"File '{file_path}' uploaded successfully as '{file_name}'.")
+            except (ClientError, BotoCoreError, OSError) as e:
+                print(f"Error uploading file '{file_path}': {e}")
+                failures.append((file_path, str(e)))
+    return failures
+
+
 def enable_versioning(bucket_name, region=REGION_NAME):
     """
     Enables versioning on the specified S3 bucket.
@@ -178,10 +482,12 @@ def enable_versioning(bucket_name, region=REGION_NAME):
     Raises:
         ClientError: If there's an issue enabling versioning.
     """
-    s3_resource = boto3.resource('s3', region_name=region)
+    s3_client = get_fast_s3_client(region)
     try:
-        bucket_versioning = s3_resource.BucketVersioning(bucket_name)
-        bucket_versioning.enable()
+        s3_client.put_bucket_versioning(
+            Bucket=bucket_name,
+            VersioningConfiguration={'Status': 'Enabled'}
+        )
         print(f"Versioning enabled on bucket '{bucket_name}'.")
     except ClientError as e:
         print(f"Error enabling versioning on bucket '{bucket_name}': {e}")
@@ -199,50 +505,11 @@ def set_lifecycle_policy(bucket_name, region=REGION_NAME):
     Raises:
         ClientError: If there's an issue setting the lifecycle policy.
     """
-    s3_client, _ = get_s3_clients(region)
-    lifecycle_configuration = {
-        'Rules': [
-            {
-                'ID': 'Healthcare data lifecycle policy',
-                'Status': 'Enabled',
-                'Filter': {'Prefix': ''},
-                'Transitions': [
-                    {
-                        'Days': 60,
-                        'StorageClass': 'INTELLIGENT_TIERING'
-                    },
-                    {
-                        'Days': 365,
-                        'StorageClass': 'GLACIER'
-                    },
-                    {
-                        'Days': 2555,  # ~7 years
-                        'StorageClass': 'DEEP_ARCHIVE'
-                    }
-                ],
-                'NoncurrentVersionTransitions': [
-                    {
-                        'NoncurrentDays': 60,
-                        'StorageClass': 'INTELLIGENT_TIERING'
-                    },
-                    {
-                        'NoncurrentDays': 365,
-                        'StorageClass': 'GLACIER'
-                    }
-                ],
-                'NoncurrentVersionExpiration': {
-                    'NoncurrentDays': 2555  # ~7 years
-                },
-                'AbortIncompleteMultipartUpload': {
-                    'DaysAfterInitiation': 7
-                }
-            }
-        ]
-    }
+    s3_client = get_fast_s3_client(region)
     try:
         s3_client.put_bucket_lifecycle_configuration(
             Bucket=bucket_name,
-            LifecycleConfiguration=lifecycle_configuration
+            LifecycleConfiguration=LIFECYCLE_CONFIGURATION
         )
         print(f"Comprehensive lifecycle policy set on bucket '{bucket_name}'.")
     except ClientError as e:
@@ -256,17 +523,17 @@ def set_bucket_policy(bucket_name, policy, region='us-east-1'):
 
     Args:
         bucket_name (str): The name of the bucket to set the policy on.
-        policy (dict): The policy to apply.
+        policy (str or dict): The policy to apply, either as a JSON string or a dict.
         region (str): The AWS region of the bucket. Defaults to 'us-east-1'.
 
     Raises:
         ClientError: If there's an issue setting the bucket policy.
     """
-    s3_client = boto3.client('s3', region_name=region)
+    s3_client = get_fast_s3_client(region)
     try:
         s3_client.put_bucket_policy(
             Bucket=bucket_name,
-            Policy=json.dumps(policy)
+            Policy=policy if isinstance(policy, str) else dump_compact_json(policy)
         )
         print(f"Bucket policy set on '{bucket_name}'.")
     except ClientError as e:
@@ -287,12 +554,20 @@ def list_bucket_contents(bucket_name, region=REGION_NAME):
     """
     s3_client, _ = get_s3_clients(region)
     try:
-        response = s3_client.list_objects_v2(Bucket=bucket_name)
-        if 'Contents' in response:
-            print(f"Contents of bucket '{bucket_name}':")
-            for obj in response['Contents']:
-                print(f"  - Object: {obj['Key']}, Size: {obj['Size']} bytes")
-        else:
+        paginator = s3_client.get_paginator('list_objects_v2')
+        pages = paginator.paginate(Bucket=bucket_name, PaginationConfig={'PageSize': 1000})
+        found = False
+        for page in pages:
+            contents = page.get('Contents')
+            if not contents:
+                continue
+            if not found:
+                print(f"Contents of bucket '{bucket_name}':")
+                found = True
+            # One write per page instead of one print per object
+            sys.stdout.write(''.join(f"  - Object: {obj['Key']}, Size: {obj['Size']} bytes\n"
+                                     for obj in contents))
+        if not found:
             print(f"No objects found in bucket '{bucket_name}'.")
     except ClientError as e:
         print(f"Error listing contents of bucket '{bucket_name}': {e}")
@@ -310,22 +585,20 @@ def list_buckets(nodate=False, collection=False):
     Returns:
         str: A formatted string containing the list of buckets or an error message.
     """
-    s3_client = boto3.client('s3')
+    s3_client, _ = get_s3_clients()
     try:
         response = s3_client.list_buckets()
         buckets = response['Buckets']
         if buckets:
             if collection:
-                bucket_names = [bucket['Name'] for bucket in buckets]
-                return ' '.join(bucket_names)
+                return ' '.join(bucket['Name'] for bucket in buckets)
             else:
-                result = ["Existing S3 buckets:"]
-                for bucket in buckets:
-                    if nodate:
-                        result.append(f"- {bucket['Name']}")
-                    else:
-                        result.append(f"- {bucket['Name']} (Created: {bucket['CreationDate']})")
-                return '\n'.join(result)
+                if nodate:
+                    format_bucket = "- {Name}".format_map
+                else:
+                    format_bucket = "- {Name} (Created: {CreationDate})".format_map
+                return '\n'.join(itertools.chain(
+                    ["Existing S3 buckets:"], map(format_bucket, buckets)))
         else:
             return "No S3 buckets found in the account."
     except ClientError as e:
@@ -343,15 +616,11 @@ def enable_encryption(bucket_name, region=REGION_NAME):
     Raises:
         ClientError: If there's an issue enabling encryption on the bucket.
     """
-    s3_client, _ = get_s3_clients(region)
+    s3_client = get_fast_s3_client(region)
     try:
         s3_client.put_bucket_encryption(
             Bucket=bucket_name,
-            ServerSideEncryptionConfiguration={
-                'Rules': [
-                    {'ApplyServerSideEncryptionByDefault': {'SSEAlgorithm': 'AES256'}}
-                ]
-            }
+            ServerSideEncryptionConfiguration=ENCRYPTION_CONFIGURATION
         )
         print(f"Enabled server-side encryption for '{bucket_name}'.")
     except ClientError as e:
@@ -372,7 +641,7 @@ def download_file(bucket_name, object_name, file_path, region='us-east-1'):
     Raises:
         ClientError: If there's an issue downloading the file from S3.
     """
-    s3_client = boto3.client('s3', region_name=region)
+    s3_client, _ = get_s3_clients(region)
     try:
         file_name = os.path.basename(object_name)
         new_file_name = f"dl_{file_name}"
@@ -0,0 +1,53 @@
+import time
+
+import pytest
+
+pytest.importorskip('botocore')
+
+from athena_module import athena_operations
+from athena_module.athena_operations import SELECT_QUERY_PATTERN
+
+
+def test_select_pattern_rejects_indented_non_select_quickly():
+    query = ' ' * 5000 + 'SHOW TABLES'
+    start = time.perf_counter()
+    assert SELECT_QUERY_PATTERN.match(query) is None
+    assert time.perf_counter() - start < 0.1
+
+
+def test_select_pattern_rejects_many_block_comments_quickly():
+    query = '/* c */\n' * 5000 + 'SHOW TABLES'
+    start = time.perf_counter()
+    assert SELECT_QUERY_PATTERN.match(query) is None
+    assert time.perf_counter() - start < 0.1
+
+
+def test_select_pattern_skips_leading_comments():
+    query = '  -- patient lookup\n  /* multi\n line */\n  SELECT * FROM patient_data'
+    assert SELECT_QUERY_PATTERN.match(query)
+
+
+def test_select_pattern_requires_select_keyword():
+    assert SELECT_QUERY_PATTERN.match('selected_rows') is None
+    assert SELECT_QUERY_PATTERN.match('-- SELECT\nSHOW TABLES') is None
+
+
+def _fail_queries(monkeypatch):
+    monkeypatch.setattr(athena_operations, 'get_athena_client', lambda region: None)
+    monkeypatch.setattr(athena_operations, 'start_query', lambda *args, **kwargs: 'qid')
+    monkeypatch.setattr(athena_operations, 'wait_for_query_to_complete',
+                        lambda *args, **kwargs: 'FAILED')
+
+
+def test_run_athena_query_returns_none_for_failed_select(monkeypatch):
+    _fail_queries(monkeypatch)
+    monkeypatch.setattr(athena_operations, 'read_query_results',
+                        lambda *args, **kwargs: pytest.fail('read results of a failed query'))
+    assert athena_operations.run_athena_query('SELECT 1', 'db', 'bucket') is None
+
+
+def test_cached_query_skips_failed_queries(monkeypatch, tmp_path):
+    _fail_queries(monkeypatch)
+    monkeypatch.setattr(athena_operations, 'QUERY_CACHE_DIR', str(tmp_path))
+    assert athena_operations.run_athena_query('SELECT 1', 'db', 'bucket', use_cache=True) is None
+    assert not list(tmp_path.iterdir())
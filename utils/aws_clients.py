@@ -0,0 +1,53 @@
+"""
+Description: This module provides a single boto3 session shared by every AWS client and
+resource the tool creates, so credentials are resolved once per process.
+"""
+
+import functools
+import threading
+
+import boto3
+
+# boto3 sessions are not thread-safe, so clients and resources are created one at a time
+_SESSION_LOCK = threading.Lock()
+
+
+@functools.lru_cache(maxsize=1)
+def get_session():
+    """
+    Initialize and return the shared boto3 session.
+
+    Returns:
+        boto3.Session: The session used to create every client and resource.
+    """
+    return boto3.Session()
+
+
+def create_client(service_name, **kwargs):
+    """
+    Create a client from the shared session.
+
+    Args:
+        service_name (str): The name of the AWS service, e.g. 's3'.
+        **kwargs: Additional arguments passed to boto3.Session.client.
+
+    Returns:
+        botocore.client.BaseClient: The service client.
+    """
+    with _SESSION_LOCK:
+        return get_session().client(service_name, **kwargs)
+
+
+def create_resource(service_name, **kwargs):
+    """
+    Create a resource from the shared session.
+
+    Args:
+        service_name (str): The name of the AWS service, e.g. 's3'.
+        **kwargs: Additional arguments passed to boto3.Session.resource.
+
+    Returns:
+        boto3.resources.base.ServiceResource: The service resource.
+    """
+    with _SESSION_LOCK:
+        return get_session().resource(service_name, **kwargs)
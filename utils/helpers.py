@@ -9,26 +9,133 @@ import datetime
 import json
 import mimetypes
 import os
+import re
 
 import click
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+REGION_NAME = 'us-east-1'
+
 CONFIG_PATH = 'config.json'
+# Binary mirror of config.json, written alongside it when msgpack is installed
+CONFIG_CACHE_PATH = 'config.msgpack'
+
+# Whitespace-delimited 'from' and 'select' tokens, matched anywhere in a query
+FROM_TABLE_PATTERN = re.compile(r'(?<!\S)from(?!\S)\s+(\S+)', re.IGNORECASE)
+SELECT_WORDS_PATTERN = re.compile(r'(?<!\S)select(?!\S)((?:\s+\S+){0,3})', re.IGNORECASE)
+FILENAME_UNSAFE_PATTERN = re.compile(r'[^\w.]')
+
+# Common extensions routed without consulting the MIME database
+IMAGE_EXTENSIONS = frozenset({'.jpg', '.jpeg', '.png', '.gif', '.webp', '.tiff', '.bmp'})
+DATA_EXTENSIONS = frozenset({'.csv', '.txt', '.json', '.tsv', '.parquet'})
+
+# The last configuration loaded or saved, keyed on config.json's (mtime, size)
+_config_cache = {'stat_key': None, 'data': None}
+
+
+def parse_json(data):
+    """
+    Parse a JSON document, using orjson when it is installed.
+
+    Args:
+        data (bytes or str): The JSON document.
+
+    Returns:
+        The parsed JSON value.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dump_json(value):
+    """
+    Serialize a value to indented JSON, using orjson when it is installed.
+
+    Args:
+        value: The value to serialize.
+
+    Returns:
+        bytes: The JSON document.
+    """
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_INDENT_2)
+    return json.dumps(value, indent=4).encode('utf-8')
+
+
+def dump_compact_json(value):
+    """
+    Serialize a value to compact JSON text, using orjson when it is installed.
+
+    Args:
+        value: The value to serialize.
+
+    Returns:
+        str: The JSON document, without insignificant whitespace.
+    """
+    if orjson is not None:
+        return orjson.dumps(value).decode('utf-8')
+    return json.dumps(value, separators=(',', ':'))
 
 
 def load_config():
     """
     Load configuration data from config.json.
 
+    The parsed configuration is cached and reused until config.json changes on disk,
+    as detected by its modification time and size. When msgpack is installed and the
+    binary mirror is at least as recent as config.json, the mirror is read instead.
+
     Raises:
         SystemExit: If the configuration file is not found or cannot be loaded.
     """
-    if not os.path.exists(CONFIG_PATH):
+    try:
+        config_stat = os.stat(CONFIG_PATH)
+    except FileNotFoundError:
         click.echo(
             "Configuration file 'config.json' not found. Please run the setup command first.")
         exit(1)
+    stat_key = (config_stat.st_mtime_ns, config_stat.st_size)
+    if _config_cache['stat_key'] == stat_key:
+        return _config_cache['data']
+
+    config_data = read_config(config_stat.st_mtime)
+    _config_cache.update(stat_key=stat_key, data=config_data)
+    return config_data
+
+
+def read_config(config_mtime):
+    """
+    Read and parse the configuration from disk, bypassing the cache.
+
+    Args:
+        config_mtime (float): The modification time of config.json.
+
+    Returns:
+        dict: The configuration data.
+
+    Raises:
+        SystemExit: If the configuration file cannot be loaded.
+    """
+    if msgpack is not None:
+        try:
+            if os.path.getmtime(CONFIG_CACHE_PATH) >= config_mtime:
+                with open(CONFIG_CACHE_PATH, 'rb') as cache_file:
+                    return msgpack.unpackb(cache_file.read())
+        except (OSError, ValueError):
+            pass  # Fall back to config.json
     try:
-        with open(CONFIG_PATH, 'r') as config_file:
-            return json.load(config_file)
+        with open(CONFIG_PATH, 'rb') as config_file:
+            return parse_json(config_file.read())
     except json.JSONDecodeError as e:
         click.echo(f"Error parsing 'config.json': {e}")
         exit(1)
@@ -39,7 +146,7 @@ def load_config():
 
 def save_config(config_data):
     """
-    Save configuration data to config.json.
+    Save configuration data to config.json, and to its binary mirror if msgpack is installed.
 
     Args:
         config_data (dict): The configuration data to save.
@@ -48,8 +155,15 @@ def save_config(config_data):
         SystemExit: If the configuration data cannot be saved.
     """
     try:
-        with open(CONFIG_PATH, 'w') as config_file:
-            json.dump(config_data, config_file, indent=4)
+        with open(CONFIG_PATH, 'wb') as config_file:
+            config_file.write(dump_json(config_data))
+        if msgpack is not None:
+            with open(CONFIG_CACHE_PATH, 'wb') as cache_file:
+                cache_file.write(msgpack.packb(config_data))
+        # Prime the cache with what was just written, keyed on the new file's stat
+        config_stat = os.stat(CONFIG_PATH)
+        _config_cache.update(stat_key=(config_stat.st_mtime_ns, config_stat.st_size),
+                             data=dict(config_data))
     except Exception as e:
         click.echo(f"Error saving configuration: {e}")
         exit(1)
@@ -66,25 +180,19 @@ def generate_filename(query):
         str: The generated filename.
     """
     current_date = datetime.datetime.now().strftime("%Y%m%d")
-    words = query.lower().split()
 
-    try:
-        table_index = words.index('from') + 1
-        table = words[table_index].split('.')[-1]
-    except (ValueError, IndexError):
-        table = 'unknown'
+    table_match = FROM_TABLE_PATTERN.search(query)
+    table = table_match.group(1).lower().split('.')[-1] if table_match else 'unknown'
 
-    try:
-        select_index = words.index('select')
-        action = '_'.join(words[select_index + 1:select_index + 4])
+    select_match = SELECT_WORDS_PATTERN.search(query)
+    if select_match:
+        action = '_'.join(select_match.group(1).lower().split())
         action = action.replace('*', 'all').replace(',', '')
-    except (ValueError, IndexError):
+    else:
         action = 'unknown'
 
     filename = f"{current_date}_{table}_{action[:50]}"
-    filename = ''.join(c for c in filename if c.isalnum() or c in ['_', '.'])
-
-    return filename
+    return FILENAME_UNSAFE_PATTERN.sub('', filename)
 
 
 def get_default_bucket(filename, config_data):
@@ -98,12 +206,14 @@ def get_default_bucket(filename, config_data):
     Returns:
         str: The name of the appropriate bucket.
     """
-    _, file_extension = os.path.splitext(filename.lower())
-    mime_type, _ = mimetypes.guess_type(filename)
+    file_extension = os.path.splitext(filename)[1].lower()
+    if file_extension in IMAGE_EXTENSIONS:
+        return config_data['images_bucket']
+    if file_extension in DATA_EXTENSIONS:
+        return config_data['data_bucket']
 
+    # Fall back to the MIME database, which is only loaded if an extension needs it
+    mime_type, _ = mimetypes.guess_type(filename)
     if mime_type and mime_type.startswith('image/'):
         return config_data['images_bucket']
-    elif file_extension in ['.csv', '.txt', '.json']:
-        return config_data['data_bucket']
-    else:
-        return config_data['data_bucket']  # Default to data bucket if file type is unknown
+    return config_data['data_bucket']  # Default to data bucket if file type is unknown